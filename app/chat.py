@@ -5,7 +5,10 @@ Run:  streamlit run app/chat.py
 """
 
 import streamlit as st
-from app.graph import run_triage, ORDERS
+# app.graph loads the mock data and compiles the graph at import. Reruns reuse
+# the module from sys.modules, so that happens once per server process and
+# needs no st.cache_resource wrapper.
+from app.graph import stream_triage, ORDERS
 
 # ── Page config ─────────────────────────────────────────────────────────────
 st.set_page_config(page_title="Ticket Triage Chat", page_icon="🎫", layout="centered")
@@ -37,40 +40,31 @@ if "messages" not in st.session_state:
                     "(e.g. ORD1001) and I'll help you out."}
     ]
 
-# ── Render existing messages ────────────────────────────────────────────────
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
+# ── Triage response, streamed section by section ───────────────────────────
+def triage_response(prompt: str):
+    """Yield the markdown response in chunks as the triage graph progresses."""
+    state = {}
+    summary_sent = False
+    for node, update in stream_triage(prompt):
+        state.update(update)
 
-# ── Handle new user input ──────────────────────────────────────────────────
-if prompt := st.chat_input("Describe your issue..."):
-    # Show user message
-    st.session_state.messages.append({"role": "user", "content": prompt})
-    with st.chat_message("user"):
-        st.markdown(prompt)
-
-    # Run the LangGraph triage
-    with st.chat_message("assistant"):
-        with st.spinner("Running triage..."):
-            result = run_triage(prompt)
-
-        if result.get("error"):
-            response = (f"**Could not process your request:** {result['error']}\n\n"
-                        "Please include a valid order ID (e.g. ORD1001) in your message.")
-            st.markdown(response)
-        else:
-            order = result.get("order") or {}
-            issue = result.get("issue_type", "unknown")
-            evidence = result.get("evidence", "")
-            recommendation = result.get("recommendation", "")
-            reply = result.get("reply_text", "")
+        # classify_issue and fetch_order run in parallel; report once both are in
+        if not summary_sent and "issue_type" in state and (
+            not state.get("order_id") or "order" in state
+        ):
+            summary_sent = True
+            order = state.get("order") or {}
+            if order.get("error"):
+                yield (f"**Could not process your request:** {order['error']}\n\n"
+                       "Please include a valid order ID (e.g. ORD1001) in your message.")
+                return
 
             lines = []
-            lines.append(f"**Issue classified:** `{issue}`")
-            lines.append(f"**Evidence:** {evidence}")
+            lines.append(f"**Issue classified:** `{state.get('issue_type', 'unknown')}`")
+            lines.append(f"**Evidence:** {state.get('evidence', '')}")
             lines.append("")
-            if result.get("order_id"):
-                lines.append(f"**Order:** {result['order_id']} — "
+            if state.get("order_id"):
+                lines.append(f"**Order:** {state['order_id']} — "
                              f"{order.get('customer_name', '')} — "
                              f"*{order.get('status', '')}*")
                 if order.get("items"):
@@ -81,13 +75,32 @@ if prompt := st.chat_input("Describe your issue..."):
             else:
                 lines.append("**Order:** N/A — no order ID found in message")
             lines.append("")
-            lines.append(f"**Recommendation:** {recommendation}")
+            yield "\n".join(lines) + "\n"
+
+        if node == "draft_reply":
+            lines = []
+            lines.append(f"**Recommendation:** {state.get('recommendation', '')}")
             lines.append("")
             lines.append("---")
             lines.append("**Draft reply to customer:**")
-            lines.append(f"> {reply}")
+            lines.append(f"> {update['messages'][-1].content}")
+            yield "\n".join(lines)
 
-            response = "\n".join(lines)
-            st.markdown(response)
+
+# ── Render existing messages ────────────────────────────────────────────────
+for msg in st.session_state.messages:
+    with st.chat_message(msg["role"]):
+        st.markdown(msg["content"])
+
+# ── Handle new user input ──────────────────────────────────────────────────
+if prompt := st.chat_input("Describe your issue..."):
+    # Show user message
+    st.session_state.messages.append({"role": "user", "content": prompt})
+    with st.chat_message("user"):
+        st.markdown(prompt)
+
+    # Run the LangGraph triage, streaming each section as it is ready
+    with st.chat_message("assistant"):
+        response = st.write_stream(triage_response(prompt))
 
     st.session_state.messages.append({"role": "assistant", "content": response})
@@ -1,21 +1,12 @@
 
 from fastapi import FastAPI, HTTPException, Query
 from pydantic import BaseModel
-import json, os, re
 
-from app.graph import run_triage
+# Mock data, indexes and matchers are loaded once, by app.graph
+from app.graph import (DEFAULT_TEMPLATE, ORDERS, ORDERS_BY_ID, REPLIES_BY_TYPE,
+                       find_order_id, match_issue, run_triage)
 
 app = FastAPI(title="Phase 1 Mock API")
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-MOCK_DIR = os.path.join(ROOT, "mock_data")
-
-def load(name):
-    with open(os.path.join(MOCK_DIR, name), "r", encoding="utf-8") as f:
-        return json.load(f)
-
-ORDERS = load("orders.json")
-ISSUES = load("issues.json")
-REPLIES = load("replies.json")
 
 class TriageInput(BaseModel):
     ticket_text: str
@@ -26,8 +17,8 @@ def health(): return {"status": "ok"}
 
 @app.get("/orders/get")
 def orders_get(order_id: str = Query(...)):
-    for o in ORDERS:
-        if o["order_id"] == order_id: return o
+    order = ORDERS_BY_ID.get(order_id)
+    if order: return order
     raise HTTPException(status_code=404, detail="Order not found")
 
 @app.get("/orders/search")
@@ -42,16 +33,13 @@ def orders_search(customer_email: str | None = None, q: str | None = None):
 
 @app.post("/classify/issue")
 def classify_issue(payload: dict):
-    text = payload.get("ticket_text", "").lower()
-    for rule in ISSUES:
-        if rule["keyword"] in text:
-            return {"issue_type": rule["issue_type"], "confidence": 0.85}
+    rule = match_issue(payload.get("ticket_text", "").lower())
+    if rule: return {"issue_type": rule["issue_type"], "confidence": 0.85}
     return {"issue_type": "unknown", "confidence": 0.1}
 
 def render_reply(issue_type: str, order):
-    template = next((r["template"] for r in REPLIES if r["issue_type"] == issue_type), None)
-    if not template: template = "Hi {{customer_name}}, we are reviewing order {{order_id}}."
-    return template.replace("{{customer_name}}", order.get("customer_name","Customer")).replace("{{order_id}}", order.get("order_id",""))
+    template = REPLIES_BY_TYPE.get(issue_type, DEFAULT_TEMPLATE)
+    return template.format_map({"customer_name": order.get("customer_name","Customer"), "order_id": order.get("order_id","")})
 
 @app.post("/reply/draft")
 def reply_draft(payload: dict):
@@ -60,12 +48,9 @@ def reply_draft(payload: dict):
 @app.post("/triage/invoke")
 def triage_invoke(body: TriageInput):
     text = body.ticket_text
-    order_id = body.order_id
-    if not order_id:
-        m = re.search(r"(ORD\d{4})", text, re.IGNORECASE)
-        if m: order_id = m.group(1).upper()
+    order_id = body.order_id or find_order_id(text)
     if not order_id: raise HTTPException(status_code=400, detail="order_id missing and not found in text")
-    order = next((o for o in ORDERS if o["order_id"] == order_id), None)
+    order = ORDERS_BY_ID.get(order_id)
     if not order: raise HTTPException(status_code=404, detail="order not found")
     issue = classify_issue({"ticket_text": text})
     reply = reply_draft({"ticket_text": text, "order": order, "issue_type": issue["issue_type"]})
@@ -0,0 +1,41 @@
+import pytest
+
+from app.graph import ORDERS_BY_ID, _to_format, classify_issue, run_triage
+
+
+def classify(text: str) -> str:
+    return classify_issue({"ticket_lower": text.lower()})["issue_type"]
+
+
+@pytest.mark.parametrize("text, issue_type", [
+    ("Can I get refunded for ORD1001?", "refund_request"),
+    ("Refunds please ORD1002", "refund_request"),
+    ("I was double charged on ORD1003", "duplicate_charge"),
+    ("My order is running lately", "late_delivery"),
+    ("Item arrived broken, I want a refund", "refund_request"),
+    ("hello there", "unknown"),
+])
+def test_classify_matches_keyword_substrings(text, issue_type):
+    assert classify(text) == issue_type
+
+
+def test_classify_considers_overlapping_keywords():
+    # "not arrived" (late_delivery) shares its final "d" with the
+    # higher-priority "damaged" rule.
+    assert classify("it has not arrivedamaged") == "damaged_item"
+
+
+def test_run_triage_results_do_not_share_order_data():
+    result = run_triage("refund ORD1001")
+    result["order"]["customer_name"] = "X"
+    result["order"]["items"][0]["name"] = "Y"
+
+    assert ORDERS_BY_ID["ORD1001"]["customer_name"] == "Ava Chen"
+    assert ORDERS_BY_ID["ORD1001"]["items"][0]["name"] == "Wireless Mouse"
+    assert run_triage("refund ORD1001")["order"]["customer_name"] == "Ava Chen"
+
+
+def test_unknown_template_placeholders_pass_through():
+    template = _to_format("Hi {{customer_name}}, ref {{ticket_ref}} {x} for {{order_id}}.")
+    rendered = template.format_map({"customer_name": "Ava", "order_id": "ORD1001"})
+    assert rendered == "Hi Ava, ref {{ticket_ref}} {x} for ORD1001."
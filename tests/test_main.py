@@ -0,0 +1,14 @@
+import pytest
+
+from app.graph import run_triage
+from app.main import classify_issue
+
+
+@pytest.mark.parametrize("text", [
+    "Can I get refunded for ORD1001?",
+    "I was double charged on ORD1003",
+    "ORD1004 is not working",
+    "Hello about ORD1005",
+])
+def test_classify_endpoint_agrees_with_graph(text):
+    assert classify_issue({"ticket_text": text})["issue_type"] == run_triage(text)["issue_type"]